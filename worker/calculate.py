@@ -6,22 +6,52 @@ making it testable in standard Python environments.
 """
 
 import math
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from math import comb
 
 
-def binomial_coefficient(n, k):
+# Pascal's triangle rows, extended lazily from the last cached row so a
+# C(n, k) for table-sized n is a pair of list indexes. Rows beyond the
+# cap would waste memory on bigint entries; those fall back to math.comb.
+_PASCAL = [[1]]
+_PASCAL_MAX_N = 256
+
+
+def binomial_coefficient(n: int, k: int) -> int:
     """Calculate binomial coefficient C(n, k) = n! / (k! * (n-k)!)"""
     if k < 0 or k > n:
         return 0
-    if k == 0 or k == n:
-        return 1
-    k = min(k, n - k)
-    result = 1
-    for i in range(k):
-        result = result * (n - i) // (i + 1)
-    return result
+    if n <= _PASCAL_MAX_N:
+        while len(_PASCAL) <= n:
+            prev = _PASCAL[-1]
+            _PASCAL.append(
+                [1, *(prev[i - 1] + prev[i] for i in range(1, len(prev))), 1]
+            )
+        return _PASCAL[n][k]
+    return comb(n, k)
+
+
+# log(i!) for i up to any plausible modded deck size, computed once at
+# import (a few hundred lgamma calls) so _lbinom is three list loads.
+_MAX_LOG_FACT = 512
+_LOG_FACT = [math.lgamma(i + 1) for i in range(_MAX_LOG_FACT + 1)]
+
+
+def _lbinom(n: int, k: int) -> float:
+    """Log of the binomial coefficient, from the log-factorial table.
+
+    Keeps large-deck pmf evaluations in hardware floats instead of
+    arbitrary-precision integers; n beyond the table uses lgamma directly.
+    """
+    if n <= _MAX_LOG_FACT:
+        return _LOG_FACT[n] - _LOG_FACT[k] - _LOG_FACT[n - k]
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
 
 
-def hypergeom_pmf(k, M, n, N):
+@lru_cache(maxsize=8192)
+def hypergeom_pmf(k: int, M: int, n: int, N: int) -> float:
     """
     Calculate probability mass function for hypergeometric distribution.
     P(X = k) = C(n, k) * C(M-n, N-k) / C(M, N)
@@ -32,14 +62,12 @@ def hypergeom_pmf(k, M, n, N):
         n: number of success states in population (matching_cards)
         N: number of draws (draw_count)
     """
-    numerator = binomial_coefficient(n, k) * binomial_coefficient(M - n, N - k)
-    denominator = binomial_coefficient(M, N)
-    if denominator == 0:
+    if k < 0 or k > n or N - k < 0 or N - k > M - n:
         return 0.0
-    return numerator / denominator
+    return math.exp(_lbinom(n, k) + _lbinom(M - n, N - k) - _lbinom(M, N))
 
 
-def hypergeom_cdf(k, M, n, N):
+def hypergeom_cdf(k: int, M: int, n: int, N: int) -> float:
     """
     Calculate cumulative distribution function for hypergeometric distribution.
     P(X <= k) = sum of P(X = i) for i = 0 to k
@@ -50,33 +78,80 @@ def hypergeom_cdf(k, M, n, N):
         n: number of success states in population (matching_cards)
         N: number of draws (draw_count)
     """
-    cumulative = 0.0
-    for i in range(int(k) + 1):
-        cumulative += hypergeom_pmf(i, M, n, N)
-    return cumulative
+    return _pmf_sum(0, k, M, n, N)
+
+
+def _pmf_values(lo: int, hi: int, M: int, n: int, N: int) -> tuple[int, list[float]]:
+    """Hypergeometric pmf values for every i in [lo, hi] via the ratio recurrence.
+
+    The bounds are clamped to the support [max(0, N-(M-n)), min(n, N)]
+    and the clamped lo is returned alongside the values. The walk seeds
+    at the distribution mode (clamped into range) — the largest term in
+    the range — and recurses outward with
+    pmf(i+1)/pmf(i) = (n-i)(N-i) / ((i+1)(M-n-N+i+1)),
+    so every step shrinks the current term. Seeding in a far tail
+    instead can underflow the seed to 0.0 (zeroing the whole sum) or
+    land on a denormal whose rounding error the recurrence then
+    amplifies across the range.
+    """
+    lo = max(lo, 0, N - (M - n))
+    hi = min(hi, n, N)
+    if hi < lo:
+        return lo, []
+    seed = min(max((N + 1) * (n + 1) // (M + 2), lo), hi)
+    values = [0.0] * (hi - lo + 1)
+    p = hypergeom_pmf(seed, M, n, N)
+    values[seed - lo] = p
+    q = p
+    for i in range(seed, hi):
+        q *= (n - i) * (N - i) / ((i + 1) * (M - n - N + i + 1))
+        values[i + 1 - lo] = q
+    q = p
+    for i in range(seed, lo, -1):
+        # inverse ratio: pmf(i-1)/pmf(i) = i(M-n-N+i) / ((n-i+1)(N-i+1))
+        q *= i * (M - n - N + i) / ((n - i + 1) * (N - i + 1))
+        values[i - 1 - lo] = q
+    return lo, values
+
+
+def _pmf_sum(lo: int, hi: int, M: int, n: int, N: int) -> float:
+    """Sum hypergeom_pmf(i, M, n, N) for i in [lo, hi].
+
+    Accumulated with math.fsum and clamped so rounding can never push a
+    probability above 1.
+    """
+    _, values = _pmf_values(lo, hi, M, n, N)
+    return min(math.fsum(values), 1.0)
+
+
+# Validation rules as (predicate, message) pairs; a rule fires when its
+# predicate is true for (deck_size, matching_cards, draw_count, min_matches).
+_VALIDATION_RULES = (
+    (lambda d, m, n, k: d < 1, "Deck size must be at least 1"),
+    (lambda d, m, n, k: m > d, "Number of matching cards cannot exceed deck size"),
+    (lambda d, m, n, k: n > d, "Draw count cannot exceed deck size"),
+    (lambda d, m, n, k: k > n, "Minimum matches cannot exceed draw count"),
+    (lambda d, m, n, k: k < 1, "Minimum matches must be at least 1"),
+)
 
 
-def validate_inputs(deck_size, matching_cards, draw_count, min_matches):
+def validate_inputs(deck_size: int, matching_cards: int, draw_count: int, min_matches: int) -> str | None:
     """Validate calculation inputs and return error message if invalid."""
-    if deck_size < 1:
-        return "Deck size must be at least 1"
-    if matching_cards > deck_size:
-        return "Number of matching cards cannot exceed deck size"
-    if draw_count > deck_size:
-        return "Draw count cannot exceed deck size"
-    if min_matches > draw_count:
-        return "Minimum matches cannot exceed draw count"
-    if min_matches < 1:
-        return "Minimum matches must be at least 1"
-    return None
-
-
-def calculate_probability(deck_size, matching_cards, draw_count, min_matches):
+    args = (deck_size, matching_cards, draw_count, min_matches)
+    return next((msg for pred, msg in _VALIDATION_RULES if pred(*args)), None)
+
+
+def calculate_probability(deck_size: int, matching_cards: int, draw_count: int, min_matches: int) -> float:
     """Calculate probability using hypergeometric distribution."""
     error = validate_inputs(deck_size, matching_cards, draw_count, min_matches)
     if error:
         raise ValueError(error)
+    return _probability(deck_size, matching_cards, draw_count, min_matches)
+
 
+@lru_cache(maxsize=16384)
+def _probability(deck_size: int, matching_cards: int, draw_count: int, min_matches: int) -> float:
+    """Compute P(X >= min_matches) for already-validated integer inputs."""
     # Probability is 0% if not enough matching cards exist
     if matching_cards < min_matches:
         return 0.0
@@ -88,16 +163,69 @@ def calculate_probability(deck_size, matching_cards, draw_count, min_matches):
     if non_matching_cards < (draw_count - min_matches + 1):
         return 1.0
 
+    # Sum whichever tail has fewer terms: the lower tail has min_matches
+    # summands, the upper tail draw_count - min_matches + 1.
+    if draw_count - min_matches + 1 < min_matches:
+        return _pmf_sum(min_matches, draw_count, deck_size, matching_cards, draw_count)
+
     # Calculate P(X >= min_matches) = 1 - P(X <= min_matches - 1)
     if min_matches == 1:
-        # P(X >= 1) = 1 - P(X = 0)
-        return 1 - hypergeom_pmf(0, deck_size, matching_cards, draw_count)
+        # P(X >= 1) = 1 - P(X = 0), with P(X = 0) as the telescoping
+        # product of the per-draw miss probabilities — no binomials.
+        p0 = 1.0
+        for i in range(draw_count):
+            p0 *= (deck_size - matching_cards - i) / (deck_size - i)
+        return 1.0 - p0
     else:
-        # P(X >= min_matches) = 1 - P(X <= min_matches - 1)
-        return 1 - hypergeom_cdf(min_matches - 1, deck_size, matching_cards, draw_count)
+        # P(X >= min_matches) = 1 - P(X <= min_matches - 1), clamped so
+        # CDF rounding can never surface as a negative probability
+        return max(0.0, 1 - hypergeom_cdf(min_matches - 1, deck_size, matching_cards, draw_count))
+
 
+def calculate_probability_batch(deck_size: int, matching_cards: int,
+                                draw_count: int, min_matches_list: list[int]) -> list[float]:
+    """Calculate P(X >= m) for several thresholds m in one pass.
 
-def count_matching_cards(deck, rank, suit):
+    Sweeping min_matches (e.g. plotting an 'at least m matches' curve)
+    with calculate_probability pays a tail summation per threshold; here
+    the pmf is walked once over its support via the ratio recurrence and
+    every threshold is answered from the accumulated upper tails.
+
+    Args:
+        deck_size: total number of cards in the deck
+        matching_cards: number of cards matching the search criteria
+        draw_count: number of cards drawn
+        min_matches_list: thresholds m to evaluate P(X >= m) for
+
+    Returns:
+        Probabilities in the same order as min_matches_list
+    """
+    for m in min_matches_list:
+        error = validate_inputs(deck_size, matching_cards, draw_count, m)
+        if error:
+            raise ValueError(error)
+
+    # One mode-seeded walk over the whole support, shared with _pmf_sum
+    lo, pmf = _pmf_values(0, draw_count, deck_size, matching_cards, draw_count)
+    hi = lo + len(pmf) - 1
+
+    # tails[j] = P(X >= lo + j)
+    tails = [0.0] * (len(pmf) + 1)
+    for j in range(len(pmf) - 1, -1, -1):
+        tails[j] = tails[j + 1] + pmf[j]
+
+    results = []
+    for m in min_matches_list:
+        if m <= lo:
+            results.append(1.0)
+        elif m > hi:
+            results.append(0.0)
+        else:
+            results.append(min(tails[m - lo], 1.0))
+    return results
+
+
+def count_matching_cards(deck: list[dict], rank: str, suit: str) -> int:
     """Count cards matching search criteria.
 
     Args:
@@ -108,10 +236,83 @@ def count_matching_cards(deck, rank, suit):
     Returns:
         Number of cards matching the criteria
     """
-    count = 0
-    for card in deck:
-        rank_match = rank == 'any' or card['rank'] == rank
-        suit_match = suit == 'any' or card['suit'] == suit
-        if rank_match and suit_match:
-            count += 1
-    return count
+    # Pick the predicate once instead of re-testing the 'any' wildcards
+    # on every card; sum(map(...)) then runs the loop at C speed.
+    if rank == 'any' and suit == 'any':
+        return len(deck)
+    if rank == 'any':
+        pred = lambda card: card['suit'] == suit
+    elif suit == 'any':
+        pred = lambda card: card['rank'] == rank
+    else:
+        pred = lambda card: card['rank'] == rank and card['suit'] == suit
+    return sum(map(pred, deck))
+
+
+def aggregate_deck(deck: list[dict]) -> Counter:
+    """Aggregate a deck into a Counter keyed by (rank, suit).
+
+    A deck has at most 52 distinct (rank, suit) pairs regardless of its
+    size, so queries against the aggregated form touch far fewer entries
+    than a scan over every card.
+    """
+    return Counter((card['rank'], card['suit']) for card in deck)
+
+
+@dataclass(frozen=True)
+class DeckIndex:
+    """Precomputed rank/suit/pair marginals for a deck.
+
+    Built once per deck, it answers any count_matching_cards-style query
+    with a single dict lookup instead of a scan.
+    """
+    by_rank: dict
+    by_suit: dict
+    by_pair: dict
+    total: int
+
+    @classmethod
+    def from_counts(cls, counts: Counter) -> 'DeckIndex':
+        """Build from a (rank, suit) Counter as produced by aggregate_deck."""
+        by_rank = Counter()
+        by_suit = Counter()
+        for (r, s), v in counts.items():
+            by_rank[r] += v
+            by_suit[s] += v
+        return cls(dict(by_rank), dict(by_suit), dict(counts), sum(counts.values()))
+
+    @classmethod
+    def from_cards(cls, deck: list[dict]) -> 'DeckIndex':
+        """Build from a list of card dictionaries."""
+        return cls.from_counts(aggregate_deck(deck))
+
+    def count(self, rank: str, suit: str) -> int:
+        """Count cards matching the criteria; 'any' matches everything."""
+        if rank == 'any' and suit == 'any':
+            return self.total
+        if rank == 'any':
+            return self.by_suit.get(suit, 0)
+        if suit == 'any':
+            return self.by_rank.get(rank, 0)
+        return self.by_pair.get((rank, suit), 0)
+
+
+def count_matching_from_counts(counts: Counter, rank: str, suit: str) -> int:
+    """Count cards matching search criteria in an aggregated deck.
+
+    Args:
+        counts: Counter mapping (rank, suit) pairs to card counts,
+            as built by aggregate_deck
+        rank: Specific rank to match, or 'any' to match all ranks
+        suit: Specific suit to match, or 'any' to match all suits
+
+    Returns:
+        Number of cards matching the criteria
+    """
+    if rank == 'any' and suit == 'any':
+        return sum(counts.values())
+    if rank == 'any':
+        return sum(v for (r, s), v in counts.items() if s == suit)
+    if suit == 'any':
+        return sum(v for (r, s), v in counts.items() if r == rank)
+    return counts.get((rank, suit), 0)
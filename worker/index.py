@@ -1,22 +1,41 @@
 from workers import Response, WorkerEntrypoint
 import json
-from calculate import calculate_probability, count_matching_cards
+from collections import Counter
+from functools import lru_cache
+from calculate import DeckIndex, calculate_probability
+
+
+@lru_cache(maxsize=64)
+def _deck_index(deck_key):
+    """Index a canonical deck key into rank/suit/pair marginals.
+
+    Users typically tweak draw_count/min_matches/search criteria against
+    the same deck, so the index is cached across requests for the
+    lifetime of the Worker isolate and each count is a dict lookup.
+    """
+    return DeckIndex.from_counts(Counter(deck_key))
+
+# Shared header bundles, built once; never mutate these.
+_JSON_CORS_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*'
+}
+_PREFLIGHT_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type'
+}
 
 def error_response(message, status=400):
     """Create error response with CORS headers."""
-    headers = {
-        'Content-Type': 'application/json',
-        'Access-Control-Allow-Origin': '*'
-    }
-    body = json.dumps({'error': message})
-    return Response(body, status=status, headers=headers)
+    # json.dumps on the message alone handles escaping; the envelope is
+    # fixed-shape so the generic encoder is unnecessary. Encoding to
+    # bytes here avoids a second str -> UTF-8 copy at the JS boundary.
+    body = f'{{"error":{json.dumps(message)}}}'.encode()
+    return Response(body, status=status, headers=_JSON_CORS_HEADERS)
 
 def success_response(probability):
     """Create success response with CORS headers."""
-    headers = {
-        'Content-Type': 'application/json',
-        'Access-Control-Allow-Origin': '*'
-    }
     # Use more precision for very small probabilities
     if probability < 0.0001:
         percentage = f"{probability * 100:.6f}%"
@@ -25,23 +44,18 @@ def success_response(probability):
     else:
         percentage = f"{probability * 100:.2f}%"
 
-    body = json.dumps({
-        'probability': probability,
-        'percentage': percentage
-    })
-    return Response(body, status=200, headers=headers)
+    # Fixed-shape payload: probability is a float and percentage only
+    # contains digits, '.' and '%', so no escaping is needed. Bytes in,
+    # so the runtime doesn't re-encode the string.
+    body = f'{{"probability":{probability!r},"percentage":"{percentage}"}}'.encode()
+    return Response(body, status=200, headers=_JSON_CORS_HEADERS)
 
 class Default(WorkerEntrypoint):
     async def fetch(self, request, env, ctx):
         """Main request handler."""
         # Handle CORS preflight
         if request.method == 'OPTIONS':
-            headers = {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
-            return Response('', status=204, headers=headers)
+            return Response('', status=204, headers=_PREFLIGHT_HEADERS)
 
         # Handle API endpoint
         if '/api/calculate' in request.url:
@@ -49,8 +63,10 @@ class Default(WorkerEntrypoint):
                 return error_response('Method Not Allowed', 405)
 
             try:
-                # Parse request body
-                body = await request.json()
+                # Parse the body with Python's json so the field reads
+                # below hit a native dict instead of crossing the JS
+                # proxy boundary once per key
+                body = json.loads(await request.text())
                 deck = body.get('deck', [])
                 draw_count = body.get('drawCount')
                 min_matches = body.get('minMatches')
@@ -58,11 +74,14 @@ class Default(WorkerEntrypoint):
                 suit = body.get('suit')
 
                 # Validate required fields
-                if not all([deck, draw_count is not None, min_matches is not None, rank, suit]):
+                if not deck or draw_count is None or min_matches is None or not rank or not suit:
                     return error_response('Missing required fields')
 
-                # Count matching cards
-                matching_cards = count_matching_cards(deck, rank, suit)
+                # Canonicalize the deck (sorted, so card order doesn't
+                # split cache entries) and reuse its aggregation across
+                # requests against the same deck
+                deck_key = tuple(sorted((card['rank'], card['suit']) for card in deck))
+                matching_cards = _deck_index(deck_key).count(rank, suit)
                 deck_size = len(deck)
 
                 # Calculate probability